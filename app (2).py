@@ -1,10 +1,26 @@
 import streamlit as st
 import pandas as pd
-from fpdf import FPDF
+import numpy as np
 from datetime import date
 from pathlib import Path
-import matplotlib.pyplot as plt
-import tempfile
+from functools import lru_cache
+
+# --------------------------------------------------
+# Budget Categories
+# --------------------------------------------------
+CATEGORIES = (
+    "Housing (Rent / EMI)",
+    "Food",
+    "Transport",
+    "Utilities",
+    "Lifestyle & Entertainment",
+    "Others"
+)
+NEEDS = frozenset({"Housing (Rent / EMI)", "Food", "Utilities"})
+WANTS = frozenset({"Lifestyle & Entertainment"})
+
+CATEGORY_DTYPE = pd.CategoricalDtype(CATEGORIES)
+BUCKET_MAP = {**dict.fromkeys(NEEDS, "Needs"), **dict.fromkeys(WANTS, "Wants")}
 
 # --------------------------------------------------
 # Page Configuration
@@ -21,12 +37,23 @@ st.caption("Finance-first learning | Assessment-ready | Unicode-safe PDF")
 # --------------------------------------------------
 # FONT LOADER (CRITICAL)
 # --------------------------------------------------
-def load_unicode_fonts(pdf):
+@st.cache_resource
+def get_font_paths():
+    # Resolved once per process; a missing file raises, so that result is not cached
     root = Path(__file__).parent
     regular = root / "DejaVuSans.ttf"
     bold = root / "DejaVuSans-Bold.ttf"
 
     if not regular.exists() or not bold.exists():
+        raise FileNotFoundError("DejaVu font files missing")
+
+    return str(regular), str(bold)
+
+
+def load_unicode_fonts(pdf):
+    try:
+        regular, bold = get_font_paths()
+    except FileNotFoundError:
         st.error(
             "Unicode font files missing.\n"
             "Ensure BOTH DejaVuSans.ttf and DejaVuSans-Bold.ttf are present "
@@ -34,8 +61,40 @@ def load_unicode_fonts(pdf):
         )
         st.stop()
 
-    pdf.add_font("DejaVu", "", str(regular), uni=True)
-    pdf.add_font("DejaVu", "B", str(bold), uni=True)
+    pdf.add_font("DejaVu", "", regular, uni=True)
+    pdf.add_font("DejaVu", "B", bold, uni=True)
+
+# --------------------------------------------------
+# BUDGET CALCULATIONS
+# --------------------------------------------------
+@lru_cache(maxsize=256)
+def fmt_inr(amount):
+    return f"₹{amount:,.0f}"
+
+
+@st.cache_data
+def compute_budget(income, amounts):
+    df = pd.DataFrame({
+        "Category": pd.Categorical(CATEGORIES, dtype=CATEGORY_DTYPE),
+        "Amount (₹)": np.array(amounts, dtype=np.int64)
+    })
+
+    total_expenses = int(df["Amount (₹)"].to_numpy().sum())
+    savings = income - total_expenses
+    savings_rate = np.divide(savings * 100, income, out=np.zeros(1), where=income > 0).item()
+
+    # Needs / Wants / Other totals for the savings chart
+    buckets = df["Category"].map(BUCKET_MAP).fillna("Other Expenses")
+    sums = df.groupby(buckets, sort=False)["Amount (₹)"].sum()
+    bucket_totals = sums.reindex(["Needs", "Wants", "Other Expenses"], fill_value=0).tolist()
+
+    return {
+        "df": df,
+        "total_expenses": total_expenses,
+        "savings": savings,
+        "savings_rate": savings_rate,
+        "bucket_totals": bucket_totals
+    }
 
 # --------------------------------------------------
 # PDF HELPERS
@@ -45,71 +104,92 @@ def add_expense_table(pdf, df):
     pdf.cell(0, 8, "🧾 Expense Breakdown", ln=True)
     pdf.ln(2)
 
-    pdf.set_font("DejaVu", "B", 11)
-    pdf.cell(110, 8, "Category", border=1)
-    pdf.cell(40, 8, "Amount (₹)", border=1, ln=True)
-
     pdf.set_font("DejaVu", "", 11)
-    for _, row in df.iterrows():
-        pdf.cell(110, 8, row["Category"], border=1)
-        pdf.cell(40, 8, f"₹{row['Amount (₹)']:,.0f}", border=1, ln=True)
+    with pdf.table(col_widths=(110, 40), width=150, align="LEFT", line_height=8) as table:
+        table.row(("Category", "Amount (₹)"))
+        for category, amount in zip(df["Category"].to_numpy(), df["Amount (₹)"].to_numpy()):
+            table.row((category, fmt_inr(amount)))
 
     pdf.ln(4)
 
 
-def add_expense_chart(pdf, df):
-    fig, ax = plt.subplots(figsize=(6, 3))
-    ax.bar(df["Category"], df["Amount (₹)"])
-    ax.set_title("Expense Distribution")
-    ax.set_ylabel("Amount (₹)")
-    ax.tick_params(axis="x", rotation=45)
-    plt.tight_layout()
+def hex_to_rgb(color):
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) for i in (0, 2, 4))
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-        chart_path = tmp.name
-        plt.savefig(chart_path, dpi=150)
 
-    plt.close(fig)
+def draw_bar_chart(pdf, title, labels, values, colors, show_values=False,
+                   rotate_labels=False, x=15, w=180, h=60):
+    # The heading is drawn here so it moves to a new page together with its chart
+    label_h = 30 if rotate_labels else 8
+    if pdf.get_y() + 10 + h + label_h > pdf.page_break_trigger:
+        pdf.add_page()
 
     pdf.set_font("DejaVu", "B", 12)
-    pdf.cell(0, 8, "📊 Expense Distribution", ln=True)
+    pdf.cell(0, 8, title, ln=True)
     pdf.ln(2)
-    pdf.image(chart_path, x=15, w=180)
-    pdf.ln(5)
 
+    top = pdf.get_y() + 6
+    base = pdf.get_y() + h
+    max_value = max(values) or 1
+    slot = w / len(values)
+    bar_w = slot * 0.6
 
-def add_savings_vs_expenses_chart(pdf, df, savings):
-    needs_categories = ["Housing (Rent / EMI)", "Food", "Utilities"]
-    wants_categories = ["Lifestyle & Entertainment"]
+    pdf.set_draw_color(0, 0, 0)
+    pdf.line(x, base, x + w, base)
 
-    needs = df[df["Category"].isin(needs_categories)]["Amount (₹)"].sum()
-    wants = df[df["Category"].isin(wants_categories)]["Amount (₹)"].sum()
-    other = df[~df["Category"].isin(needs_categories + wants_categories)]["Amount (₹)"].sum()
+    pdf.set_font("DejaVu", "", 8)
+    with pdf.rotation(90, x=x - 2, y=base):
+        pdf.text(x - 2, base, "Amount (₹)")
 
-    labels = ["Needs", "Wants", "Other Expenses", "Savings"]
-    values = [needs, wants, other, max(savings, 0)]
-    colors = ["#d62728", "#ff7f0e", "#7f7f7f", "#2ca02c"]
+    for i, (label, value, color) in enumerate(zip(labels, values, colors)):
+        cx = x + slot * (i + 0.5)
+        bar_h = (base - top) * value / max_value
 
-    fig, ax = plt.subplots(figsize=(6, 3))
-    ax.bar(labels, values, color=colors)
-    ax.set_title("Savings vs Expenses (Needs / Wants)")
-    ax.set_ylabel("Amount (₹)")
+        if bar_h > 0:
+            pdf.set_fill_color(*hex_to_rgb(color))
+            pdf.rect(cx - bar_w / 2, base - bar_h, bar_w, bar_h, "F")
 
-    for i, v in enumerate(values):
-        ax.text(i, v + max(values) * 0.02, f"₹{v:,.0f}", ha="center", fontsize=9)
+        if show_values:
+            text = fmt_inr(value)
+            pdf.text(cx - pdf.get_string_width(text) / 2, base - bar_h - 1.5, text)
 
-    plt.tight_layout()
+        label_w = pdf.get_string_width(label)
+        if rotate_labels:
+            with pdf.rotation(45, x=cx, y=base + 4):
+                pdf.text(cx - label_w, base + 4, label)
+        else:
+            pdf.text(cx - label_w / 2, base + 4, label)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".png") as tmp:
-        chart_path = tmp.name
-        plt.savefig(chart_path, dpi=150)
+    pdf.set_y(base + label_h)
 
-    plt.close(fig)
 
-    pdf.set_font("DejaVu", "B", 12)
-    pdf.cell(0, 8, "📊 Savings vs Expenses Overview", ln=True)
-    pdf.ln(2)
-    pdf.image(chart_path, x=15, w=180)
+def add_expense_chart(pdf, df):
+    draw_bar_chart(
+        pdf,
+        "📊 Expense Distribution",
+        list(df["Category"]),
+        list(df["Amount (₹)"]),
+        ["#1f77b4"] * len(df),
+        show_values=True,
+        rotate_labels=True
+    )
+    pdf.ln(5)
+
+
+def add_savings_vs_expenses_chart(pdf, bucket_totals, savings):
+    labels = ["Needs", "Wants", "Other Expenses", "Savings"]
+    values = list(bucket_totals) + [max(savings, 0)]
+    colors = ["#d62728", "#ff7f0e", "#7f7f7f", "#2ca02c"]
+
+    draw_bar_chart(
+        pdf,
+        "📊 Savings vs Expenses Overview",
+        labels,
+        values,
+        colors,
+        show_values=True
+    )
     pdf.ln(5)
 
 # --------------------------------------------------
@@ -130,27 +210,20 @@ with tab1:
     st.divider()
     st.subheader("📊 Expenses")
 
-    categories = [
-        "Housing (Rent / EMI)",
-        "Food",
-        "Transport",
-        "Utilities",
-        "Lifestyle & Entertainment",
-        "Others"
-    ]
+    amounts = tuple(st.number_input(f"{c} (₹)", min_value=0, step=500) for c in CATEGORIES)
+    budget = compute_budget(income, amounts)
 
-    expenses = {c: st.number_input(f"{c} (₹)", min_value=0, step=500) for c in categories}
-    df = pd.DataFrame({"Category": expenses.keys(), "Amount (₹)": expenses.values()})
-
-    total_expenses = df["Amount (₹)"].sum()
-    savings = income - total_expenses
-    savings_rate = (savings / income * 100) if income > 0 else 0
+    df = budget["df"]
+    total_expenses = budget["total_expenses"]
+    savings = budget["savings"]
+    savings_rate = budget["savings_rate"]
+    bucket_totals = budget["bucket_totals"]
 
     st.divider()
     c1, c2, c3 = st.columns(3)
-    c1.metric("Income", f"₹{income:,.0f}")
-    c2.metric("Expenses", f"₹{total_expenses:,.0f}")
-    c3.metric("Savings", f"₹{savings:,.0f}")
+    c1.metric("Income", fmt_inr(income))
+    c2.metric("Expenses", fmt_inr(total_expenses))
+    c3.metric("Savings", fmt_inr(savings))
 
 # ==================================================
 # TAB 2: REFLECTION + PDF
@@ -172,6 +245,8 @@ with tab2:
             st.warning("Please enter your name and course.")
             st.stop()
 
+        from fpdf import FPDF
+
         pdf = FPDF()
         pdf.add_page()
         pdf.set_auto_page_break(auto=True, margin=15)
@@ -181,24 +256,28 @@ with tab2:
         pdf.cell(0, 10, "Budgeting & Expense Tracker – Submission", ln=True)
 
         pdf.set_font("DejaVu", "", 11)
-        pdf.cell(0, 8, f"Name: {student_name}", ln=True)
-        pdf.cell(0, 8, f"Course: {course}", ln=True)
-        pdf.cell(0, 8, f"Date: {date.today().strftime('%d %B %Y')}", ln=True)
+        pdf.multi_cell(0, 8, "\n".join([
+            f"Name: {student_name}",
+            f"Course: {course}",
+            f"Date: {date.today().strftime('%d %B %Y')}"
+        ]))
 
         pdf.ln(4)
         pdf.set_font("DejaVu", "B", 12)
         pdf.cell(0, 8, "📊 Budget Summary", ln=True)
 
         pdf.set_font("DejaVu", "", 11)
-        pdf.cell(0, 8, f"Income: ₹{income:,.0f}", ln=True)
-        pdf.cell(0, 8, f"Expenses: ₹{total_expenses:,.0f}", ln=True)
-        pdf.cell(0, 8, f"Savings: ₹{savings:,.0f}", ln=True)
-        pdf.cell(0, 8, f"Savings Rate: {savings_rate:.1f}%", ln=True)
+        pdf.multi_cell(0, 8, "\n".join([
+            f"Income: {fmt_inr(income)}",
+            f"Expenses: {fmt_inr(total_expenses)}",
+            f"Savings: {fmt_inr(savings)}",
+            f"Savings Rate: {savings_rate:.1f}%"
+        ]))
 
         pdf.ln(4)
         add_expense_table(pdf, df)
         add_expense_chart(pdf, df)
-        add_savings_vs_expenses_chart(pdf, df, savings)
+        add_savings_vs_expenses_chart(pdf, bucket_totals, savings)
 
         pdf.set_font("DejaVu", "B", 12)
         pdf.cell(0, 8, "🧠 Student Reflection", ln=True)
@@ -206,14 +285,13 @@ with tab2:
         pdf.multi_cell(0, 8, f"{r1}\n\n{r2}\n\n{r3}\n\n{r4}\n\n{r5}")
 
         filename = f"{student_name.replace(' ', '_')}_Budget_Submission.pdf"
-        pdf.output(filename)
-
-        with open(filename, "rb") as f:
-            st.download_button(
-                "⬇️ Download PDF",
-                data=f,
-                file_name=filename,
-                mime="application/pdf"
-            )
+        pdf_bytes = bytes(pdf.output())
+
+        st.download_button(
+            "⬇️ Download PDF",
+            data=pdf_bytes,
+            file_name=filename,
+            mime="application/pdf"
+        )
 
         st.success("✅ PDF generated successfully!")